@@ -1,3 +1,6 @@
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Literal, Optional, Union, List
 from pydantic import BaseModel, Field, model_validator
 
@@ -5,6 +8,16 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+# Cache LLM responses in a local SQLite file so repeated utterances (users
+# add the same staples over and over) skip the Gemini round-trip and its
+# token cost entirely.
+try:
+    from langchain.globals import set_llm_cache
+    from langchain_community.cache import SQLiteCache
+    set_llm_cache(SQLiteCache(database_path=".langchain.db"))
+except ImportError:
+    print("WARNING: langchain-community is not installed. LLM response caching is disabled.")
+
 
 # --- Pydantic Models for Structured, Validated Output ---
 # These models define the exact JSON structure we expect from the LLM.
@@ -48,8 +61,15 @@ class LLMResponse(BaseModel):
             raise ValueError("ambiguous_request cannot be set with database_operation or suggestion")
         return self
 
+# The output parser is request-invariant (its format instructions are derived
+# solely from the LLMResponse schema), so it is built once at import and
+# shared by every LLMAssistant instance.
+_PARSER = PydanticOutputParser(pydantic_object=LLMResponse)
+
+
 class LLMAssistant:
-    def __init__(self, api_key: Optional[str], model_name: str = 'gemini-1.5-flash-latest'):
+    def __init__(self, api_key: Optional[str], model_name: str = 'gemini-1.5-flash-latest',
+                 prerender_prompt: bool = True):
         # 1. Initialize the LangChain model wrapper
         if not api_key:
             print("WARNING: LLMAssistant initialized without an API key. Model will be disabled.")
@@ -58,10 +78,14 @@ class LLMAssistant:
             self.model = ChatGoogleGenerativeAI(
                 model=model_name,
                 google_api_key=api_key,
+                # gRPC keeps one HTTP/2 channel alive for the life of this
+                # (process-wide) instance, so successive calls reuse the warm
+                # TLS session instead of paying TCP + TLS handshakes each time.
+                transport="grpc",
             )
 
-        # 2. Initialize the parser with our Pydantic model
-        self.parser = PydanticOutputParser(pydantic_object=LLMResponse)
+        # 2. Use the shared module-level parser
+        self.parser = _PARSER
         # 3. Create a robust prompt template
         self.prompt_template = PromptTemplate(
             template="""You are a database assistant for a personal item manager. Your task is to convert a user's natural language request into a structured JSON object.
@@ -90,23 +114,143 @@ User Request: "{user_input}"
         else:
             self.chain = None
 
+        # 5. Optionally pre-render the static portion of the prompt once.
+        # The format-instructions block never changes between requests, so
+        # per-call prompt construction can be a plain string concatenation
+        # instead of a full template render. The flag exists so the original
+        # chain path can be restored if the template gains new variables.
+        self.prerender_prompt = prerender_prompt
+
+        # In-memory LRU of parsed responses keyed by (canonical input, item
+        # context digest). Sits above the SQLite prompt cache: a hit costs a
+        # dict lookup and skips model, disk, and parsing entirely. The item
+        # context is part of the key, so a user's own mutations naturally
+        # invalidate their entries and no state leaks across differing lists.
+        self._response_cache = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        self._response_cache_size = 256
+        rendered = self.prompt_template.template.replace(
+            "{format_instructions}", self.parser.get_format_instructions()
+        )
+        head, rest = rendered.split("{item_context}")
+        mid, tail = rest.split("{user_input}")
+        self._prompt_parts = (head, mid, tail)
+
+    @staticmethod
+    def _canonicalize(user_input):
+        """Normalizes whitespace and case so trivial variants ("Add milk",
+        "add milk ") produce the same prompt and hit the same cache row."""
+        return " ".join(user_input.split()).lower()
+
+    @staticmethod
+    def _build_item_context(current_items):
+        if not current_items:
+            return "The user currently has no items."
+        item_list_str = "\n".join([f"- \"{item['content']}\"" for item in current_items])
+        return f"""Here is the user's current list of items. Use this list to resolve ambiguity and to find the exact 'content' for UPDATE and DELETE operations.
+{item_list_str}"""
+
+    @staticmethod
+    def _cache_key(user_input, item_context):
+        return (user_input, hashlib.sha1(item_context.encode()).hexdigest())
+
+    def _cache_get(self, key):
+        with self._response_cache_lock:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)
+            return cached
+
+    def _cache_put(self, key, response):
+        with self._response_cache_lock:
+            self._response_cache[key] = response
+            if len(self._response_cache) > self._response_cache_size:
+                self._response_cache.popitem(last=False)
+
+    def _build_prompt(self, user_input, item_context):
+        head, mid, tail = self._prompt_parts
+        return "".join((head, item_context, mid, user_input, tail))
+
+    def _parse_model_output(self, text):
+        # Slice straight to the outermost JSON object instead of scrubbing
+        # markdown fences with repeated string copies, and hand it to
+        # pydantic's Rust-backed JSON parser. Fall back to the langchain
+        # parser for anything that isn't shaped as expected.
+        start = text.find('{')
+        end = text.rfind('}') + 1
+        if 0 <= start < end:
+            try:
+                return LLMResponse.model_validate_json(text[start:end])
+            except ValueError:
+                pass
+        return self.parser.parse(text)
+
     def get_database_operation_from_text(self, user_input, current_items=None):
         """Uses a LangChain chain to convert natural language to a structured Pydantic object."""
         if not self.chain:
             print("LLM chain is not initialized (likely missing API key).")
             return None
 
-        item_context = "The user currently has no items."
-        if current_items:
-            item_list_str = "\n".join([f"- \"{item['content']}\"" for item in current_items])
-            item_context = f"""Here is the user's current list of items. Use this list to resolve ambiguity and to find the exact 'content' for UPDATE and DELETE operations.
-{item_list_str}"""
+        user_input = self._canonicalize(user_input)
+        item_context = self._build_item_context(current_items)
+
+        cache_key = self._cache_key(user_input, item_context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            if self.prerender_prompt:
+                prompt = self._build_prompt(user_input, item_context)
+                # Stream the response and accumulate chunks as they arrive
+                # rather than blocking on the fully-buffered reply; tokens are
+                # consumed off the wire as soon as Gemini emits them.
+                text = "".join(chunk.content for chunk in self.model.stream(prompt))
+                response = self._parse_model_output(text)
+            else:
+                response = self.chain.invoke({
+                    "user_input": user_input,
+                    "item_context": item_context
+                })
+            if response is not None:
+                self._cache_put(cache_key, response)
+            return response
+        except Exception as e:
+            print(f"An error occurred with the LangChain chain: {e}")
+            return None
+
+    async def aget_database_operation_from_text(self, user_input, current_items=None):
+        """Async variant of get_database_operation_from_text.
+
+        Awaiting the model call frees the event loop for the hundreds of
+        milliseconds the Gemini round-trip takes, so the server can make
+        progress on other requests instead of blocking a worker.
+        """
+        if not self.chain:
+            print("LLM chain is not initialized (likely missing API key).")
+            return None
+
+        user_input = self._canonicalize(user_input)
+        item_context = self._build_item_context(current_items)
+
+        cache_key = self._cache_key(user_input, item_context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            return self.chain.invoke({
-                "user_input": user_input,
-                "item_context": item_context
-            })
+            if self.prerender_prompt:
+                prompt = self._build_prompt(user_input, item_context)
+                reply = await self.model.ainvoke(prompt)
+                response = self._parse_model_output(reply.content)
+            else:
+                response = await self.chain.ainvoke({
+                    "user_input": user_input,
+                    "item_context": item_context
+                })
+            if response is not None:
+                self._cache_put(cache_key, response)
+            return response
         except Exception as e:
             print(f"An error occurred with the LangChain chain: {e}")
             return None
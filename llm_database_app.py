@@ -1,24 +1,102 @@
+import asyncio
+import atexit
+import hashlib
+import inspect
+import logging
 import os
-import json
 import sqlite3
-from flask import Flask, request, jsonify, session, render_template
+import threading
+import time
+from collections import OrderedDict
+import msgspec
+import orjson
+from flask import Flask, Response, request, jsonify, session, render_template
+from flask.json.provider import JSONProvider
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.exceptions import HTTPException
 import google.generativeai as genai
 from functools import wraps
 from dotenv import load_dotenv
+import re
 from database import UserDatabase
-from llm_assistant import LLMAssistant
+from llm_assistant import (
+    LLMAssistant,
+    LLMResponse,
+    DatabaseOperation,
+    InsertData,
+    WhereClause,
+)
 
 
 # --- Configuration ---
 load_dotenv() # Load environment variables from .env file
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson's Rust serializer.
+
+    Covers both request.get_json() and jsonify(), which sit on the hot path
+    of every endpoint; orjson is roughly 2x faster than the stdlib on decode
+    and much faster on encode.
+    """
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class BLAKE2bSessionInterface(SecureCookieSessionInterface):
+    """Signs session cookies with BLAKE2b instead of the default SHA-1 HMAC.
+
+    BLAKE2b is faster per signature/verification, and this runs on every
+    request that carries a session cookie.
+    """
+    digest_method = staticmethod(hashlib.blake2b)
+
+
 app = Flask(__name__)
-app.secret_key = os.urandom(24) # Necessary for session management
+app.json = OrjsonProvider(app)
+# A stable key keeps sessions valid across restarts; regenerating it per
+# process would log every client out on redeploy and trigger a storm of
+# expensive password verifications.
+flask_secret_key = os.environ.get("FLASK_SECRET_KEY")
+if flask_secret_key:
+    app.secret_key = flask_secret_key.encode()
+else:
+    print("="*50)
+    print("WARNING: FLASK_SECRET_KEY environment variable not set.")
+    print("Falling back to a random key; sessions will not survive restarts.")
+    print("="*50)
+    app.secret_key = os.urandom(24) # Necessary for session management
+app.session_interface = BLAKE2bSessionInterface()
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+# Server-side sessions: when a Redis URL is configured, the cookie carries
+# only an opaque session id and each request costs one Redis GET instead of
+# an HMAC verify/re-sign over the full session payload. msgpack is used for
+# the stored payloads since it is faster and smaller than pickle.
+session_redis_url = os.environ.get("SESSION_REDIS_URL")
+if session_redis_url:
+    try:
+        import redis
+        from flask_session import Session
+        app.config.update(
+            SESSION_TYPE='redis',
+            SESSION_REDIS=redis.Redis.from_url(session_redis_url),
+            SESSION_SERIALIZATION_FORMAT='msgpack',
+        )
+        Session(app)
+    except ImportError:
+        print("="*50)
+        print("WARNING: SESSION_REDIS_URL is set but flask-session/redis are not installed.")
+        print("Falling back to signed-cookie sessions.")
+        print("="*50)
 # It's best practice to load your API key from environment variables
 # IMPORTANT: Do not commit your API key to version control.
 gemini_api_key = os.environ.get("GEMINI_API_KEY")
 if gemini_api_key:
-    genai.configure(api_key=gemini_api_key)
+    # Same persistent HTTP/2 (gRPC) channel policy as the LLMAssistant model:
+    # calls reuse one warm TLS session instead of re-handshaking under load.
+    genai.configure(api_key=gemini_api_key, transport="grpc")
 else:
     print("="*50)
     print("WARNING: GEMINI_API_KEY environment variable not set.")
@@ -28,12 +106,32 @@ else:
 
 # Initialize database
 user_db = UserDatabase("app_database.db")
+# Connections are thread-local and live for the life of each thread; only the
+# main thread's connection needs an explicit close at interpreter shutdown.
+atexit.register(user_db.close_connection)
 
 # Initialize LLM Assistant
 llm_assistant = LLMAssistant(api_key=gemini_api_key)
 
 # --- Centralized Error Handling ---
 
+@app.errorhandler(HTTPException)
+def handle_http_exception(e):
+    """Passes Flask's own 4xx/5xx responses through unchanged.
+
+    Without this, the catch-all Exception handler below would swallow
+    aborts and routing errors (401, 404, ...) and turn them into 500s.
+    """
+    return e
+
+
+@app.errorhandler(sqlite3.OperationalError)
+def handle_database_unavailable(e):
+    """Answers database lock/availability problems with a 503 so clients retry."""
+    print(f"ERROR: Database unavailable: {e}")
+    return jsonify({"error": "The database is temporarily unavailable. Please retry."}), 503
+
+
 @app.errorhandler(Exception)
 def handle_generic_exception(e):
     """Catches all unhandled exceptions and returns a standard JSON error response."""
@@ -44,6 +142,44 @@ def handle_generic_exception(e):
     return jsonify({"error": "An internal server error occurred."}), 500
 
 
+# --- Request Schemas ---
+# msgspec parses and validates the body in one C pass, replacing the
+# get_json() + data.get(...) chains and their manual None checks.
+
+class RegisterRequest(msgspec.Struct):
+    name: str
+    email: str
+    password: str
+
+
+class LoginRequest(msgspec.Struct):
+    email: str
+    password: str
+
+
+class AddItemRequest(msgspec.Struct):
+    content: str
+
+
+class ProcessRequest(msgspec.Struct):
+    text: str
+
+
+class ProcessBatchRequest(msgspec.Struct):
+    texts: list[str]
+
+
+def _decode_request(struct_type, error_message="Invalid or missing JSON body"):
+    """Decodes and validates the request body against a msgspec Struct.
+
+    Returns (struct, None) on success, else (None, error response).
+    """
+    try:
+        return msgspec.json.decode(request.get_data(), type=struct_type), None
+    except msgspec.DecodeError:
+        return None, (jsonify({"error": error_message}), 400)
+
+
 # --- API Endpoints ---
 
 @app.route('/')
@@ -52,22 +188,62 @@ def index():
     # This assumes you have a 'templates' folder with an 'index.html' file.
     return render_template('index.html')
 
+# Recently-verified user ids mapped to their cache expiry time. Re-verifying
+# a user's existence on every authenticated request doubled the SQLite
+# transaction count on the hot path; within the TTL the check is a dict
+# lookup. Entries are dropped on logout, and a deleted account locks out as
+# soon as its entry expires.
+_USER_CHECK_TTL_SECONDS = 300
+_MAX_VERIFIED_USERS = 10_000
+_verified_users = {}
+
+
+def _validate_session():
+    """Returns (user_id, None) for a valid session, else (None, error response)."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None, (jsonify({"error": "Authentication required. Please log in."}), 401)
+
+    now = time.monotonic()
+    if _verified_users.get(user_id, 0) > now:
+        return user_id, None
+
+    # Good practice: Check if the user still exists in the database.
+    # This handles cases where a user might be deleted but their session cookie remains.
+    with user_db.managed_cursor(commit_on_exit=False) as cursor:
+        cursor.execute("SELECT id FROM users WHERE id = ?", (user_id,))
+        if not cursor.fetchone():
+            session.clear() # Clear the invalid session
+            _verified_users.pop(user_id, None)
+            return None, (jsonify({"error": "Invalid session. Please log in again."}), 401)
+
+    if len(_verified_users) >= _MAX_VERIFIED_USERS:
+        _verified_users.clear()  # Crude but rare size bound.
+    _verified_users[user_id] = now + _USER_CHECK_TTL_SECONDS
+    return user_id, None
+
+
 def login_required(f):
-    """Decorator to ensure a user is logged in before accessing an endpoint."""
+    """Decorator to ensure a user is logged in before accessing an endpoint.
+
+    Works for both sync and async view functions so LLM-bound endpoints can
+    await their work without losing the auth check.
+    """
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            user_id, error = _validate_session()
+            if error:
+                return error
+            # Pass the user_id to the decorated function
+            return await f(user_id=user_id, *args, **kwargs)
+        return decorated_function
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({"error": "Authentication required. Please log in."}), 401
-        
-        # Good practice: Check if the user still exists in the database.
-        # This handles cases where a user might be deleted but their session cookie remains.
-        with user_db.managed_cursor(commit_on_exit=False) as cursor:
-            cursor.execute("SELECT id FROM users WHERE id = ?", (user_id,))
-            if not cursor.fetchone():
-                session.clear() # Clear the invalid session
-                return jsonify({"error": "Invalid session. Please log in again."}), 401
-
+        user_id, error = _validate_session()
+        if error:
+            return error
         # Pass the user_id to the decorated function
         return f(user_id=user_id, *args, **kwargs)
     return decorated_function
@@ -76,17 +252,19 @@ def login_required(f):
 @app.route('/register', methods=['POST'])
 def register():
     """Registers a new user."""
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
-    name = data.get('name')
-    email = data.get('email')
-    password = data.get('password')
-
-    if not name or not email or not password:
+    req, error = _decode_request(RegisterRequest)
+    if error:
+        return error
+    if not req.name or not req.email or not req.password:
         return jsonify({"error": "Missing name, email, or password"}), 400
 
-    success, message = user_db.register_user(name, email, password)
+    # Plain sync call: the bcrypt work already runs in the hash worker
+    # pool, and under threaded gunicorn workers only this thread blocks on
+    # the ~250ms wait. (An async view here would be counterproductive —
+    # under WSGI it runs via async_to_sync, which still occupies the
+    # serving thread, and each call's asyncio.to_thread would touch SQLite
+    # from a throwaway thread, defeating the thread-local connection reuse.)
+    success, message = user_db.register_user(req.name, req.email, req.password)
 
     if success:
         return jsonify({"success": True, "message": message}), 201
@@ -96,16 +274,14 @@ def register():
 @app.route('/login', methods=['POST'])
 def login():
     """Logs a user in by creating a session."""
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
-    email = data.get('email')
-    password = data.get('password')
-
-    if not email or not password:
+    req, error = _decode_request(LoginRequest)
+    if error:
+        return error
+    if not req.email or not req.password:
         return jsonify({"error": "Missing email or password"}), 400
 
-    user = user_db.authenticate_user(email, password)
+    # Sync on purpose; see register() for why an async view buys nothing here.
+    user = user_db.authenticate_user(req.email, req.password)
 
     if user:
         session.clear()
@@ -118,34 +294,57 @@ def login():
 @app.route('/logout', methods=['POST'])
 def logout():
     """Logs the current user out."""
+    _verified_users.pop(session.get('user_id'), None)
     session.clear()
     return jsonify({"success": True, "message": "Logout successful."}), 200
 
 @app.route('/items', methods=['GET'])
 @login_required
 def get_items(user_id):
-    """Retrieves all items for the logged-in user."""
-    with user_db.managed_cursor(commit_on_exit=False) as cursor:
-        cursor.execute("SELECT id, content FROM items WHERE user_id = ?", (user_id,))
-        items = cursor.fetchall()
-    # Convert Row objects to a list of dictionaries for JSON serialization
-    items_list = [dict(item) for item in items]
-    return jsonify({"success": True, "items": items_list})
+    """Retrieves all items for the logged-in user, streaming the response.
+
+    Rows go straight from the cursor into the response body, so peak memory
+    stays constant regardless of list size and the client can start parsing
+    before SQLite finishes the scan.
+    """
+    def generate():
+        # The generator owns its cursor: it must stay open while the
+        # response body is being written, after the view has returned.
+        cursor = user_db.get_read_connection().cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(SQL_SELECT_ITEMS, (user_id,))
+            yield b'{"success":true,"items":['
+            first = True
+            for item_id, content in cursor:
+                if first:
+                    first = False
+                else:
+                    yield b','
+                yield orjson.dumps({"id": item_id, "content": content})
+            yield b']}'
+        finally:
+            cursor.close()
+
+    return Response(generate(), mimetype='application/json')
 
 @app.route('/items/add', methods=['POST'])
 @login_required
 def add_suggested_item(user_id):
     """Adds a single, specific item to the user's list, typically from a suggestion."""
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
-    content = data.get('content')
+    req, error = _decode_request(AddItemRequest)
+    if error:
+        return error
+    content = req.content
 
     if not content:
         return jsonify({"error": "No content provided"}), 400
-    
+
     status, item_id = user_db.add_item(user_id, content)
 
+    if status == "added":
+        _invalidate_items_cache(user_id)
+
     if status == "exists":
         return jsonify({
             "success": False,
@@ -161,43 +360,171 @@ def add_suggested_item(user_id):
 
 # --- Helper functions for process_request ---
 
-def _handle_insert(cursor, db_op, user_id):
-    """Handles the INSERT database operation, preventing duplicates."""
+# RETURNING needs SQLite 3.35+; older libraries fall back to lastrowid/rowcount.
+_SQLITE_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
+# Hot statements hoisted to module level: a single interned string per
+# statement means SQLite's per-connection statement cache always sees the
+# identical text and reuses the compiled program.
+SQL_SELECT_ITEMS = "SELECT id, content FROM items WHERE user_id = ?"
+SQL_SELECT_ITEM_CONTENTS = "SELECT content FROM items WHERE user_id = ?"
+SQL_SELECT_ITEM_BY_NORM = (
+    "SELECT id FROM items WHERE content_norm = lower(trim(?)) AND user_id = ?"
+)
+SQL_INSERT_ITEM = "INSERT INTO items (content, user_id) VALUES (?, ?)"
+SQL_INSERT_ITEM_UPSERT = (
+    SQL_INSERT_ITEM + " ON CONFLICT(user_id, content_norm) DO NOTHING RETURNING id"
+)
+SQL_UPDATE_ITEM = (
+    "UPDATE items SET content = ? WHERE content_norm = lower(trim(?)) AND user_id = ?"
+)
+SQL_DELETE_ITEM = (
+    "DELETE FROM items WHERE content_norm = lower(trim(?)) AND user_id = ?"
+)
+
+# Per-user cache of the item list used as LLM context. For cache-hot users
+# this removes one SELECT per /process-request; any successful mutation for
+# a user drops their entry. Bounded LRU so it cannot grow without limit.
+# Entries also expire after a short TTL: the cache is per-process, so under
+# multiple gunicorn workers a mutation routed to one worker cannot
+# invalidate the others — the TTL caps how stale their context can get.
+_ITEMS_CACHE_SIZE = 1024
+_ITEMS_CACHE_TTL_SECONDS = 30
+_items_cache = OrderedDict()
+_items_cache_lock = threading.Lock()
+
+
+def _get_cached_items(user_id):
+    with _items_cache_lock:
+        entry = _items_cache.get(user_id)
+        if entry is None:
+            return None
+        items_list, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _items_cache[user_id]
+            return None
+        _items_cache.move_to_end(user_id)
+        return items_list
+
+
+def _set_cached_items(user_id, items_list):
+    with _items_cache_lock:
+        _items_cache[user_id] = (items_list, time.monotonic() + _ITEMS_CACHE_TTL_SECONDS)
+        if len(_items_cache) > _ITEMS_CACHE_SIZE:
+            _items_cache.popitem(last=False)
+
+
+def _invalidate_items_cache(user_id):
+    with _items_cache_lock:
+        _items_cache.pop(user_id, None)
+
+
+# Regex fast-path for trivially-structured utterances. Anything these match
+# can be turned into a DatabaseOperation directly, skipping an LLM round-trip
+# of hundreds of milliseconds; everything else still goes to Gemini.
+INSERT_RE = re.compile(r'^\s*(?:add|buy|get|insert)\s+(.{1,200})\s*$', re.IGNORECASE)
+DELETE_RE = re.compile(r'^\s*(?:delete|remove|drop)\s+(.{1,200})\s*$', re.IGNORECASE)
+LIST_RE = re.compile(r'^\s*(?:list|show|what)', re.IGNORECASE)
+
+# Longest request worth forwarding to the LLM; anything bigger is rejected
+# before it can burn tokens.
+MAX_REQUEST_TEXT_LENGTH = 500
+
+# Batch endpoint bounds: size of one batch, and how many Gemini calls may be
+# in flight at once (to stay inside API rate limits).
+MAX_BATCH_TEXTS = 20
+LLM_BATCH_CONCURRENCY = 50
+
+# Translation table that deletes control characters (except tab, LF, CR);
+# precomputed so sanitizing is a single C-level call per request.
+_CTRL_TBL = str.maketrans(
+    '', '', ''.join(chr(i) for i in range(32) if i not in (9, 10, 13))
+)
+
+
+def _fast_parse(user_text):
+    """Builds an LLMResponse for simple add/delete/list requests, else None."""
+    match = INSERT_RE.match(user_text)
+    if match:
+        return LLMResponse(database_operation=DatabaseOperation(
+            action="INSERT", table="items", data=InsertData(content=match.group(1))
+        ))
+    match = DELETE_RE.match(user_text)
+    if match:
+        return LLMResponse(database_operation=DatabaseOperation(
+            action="DELETE", table="items", where=WhereClause(content=match.group(1))
+        ))
+    if LIST_RE.match(user_text):
+        return LLMResponse(database_operation=DatabaseOperation(
+            action="QUERY", table="items"
+        ))
+    return None
+
+def _handle_insert(cursor, db_op, user_id, existing=None):
+    """Handles the INSERT database operation, preventing duplicates.
+
+    When the caller already fetched the user's items (the LLM-context path),
+    `existing` maps normalized content to item id and the duplicate check is
+    a dict lookup instead of a second query over the same table.
+    """
     if not db_op.data or not db_op.data.content:
         return {"error": "Missing 'content' in the data for INSERT."}, 400
 
     content = db_op.data.content
-    normalized_content = content.strip().lower()
 
-    # Check for existence using the provided cursor
-    cursor.execute(
-        "SELECT id FROM items WHERE lower(content) = ? AND user_id = ?",
-        (normalized_content, user_id)
-    )
-    existing_item = cursor.fetchone()
+    if _SQLITE_RETURNING:
+        # One statement does both the duplicate check (via the unique index
+        # on user_id, content_norm) and the insert; RETURNING tells us
+        # whether a row actually went in.
+        cursor.execute(SQL_INSERT_ITEM_UPSERT, (content.strip(), user_id))
+        row = cursor.fetchone()
+        if row:
+            return {
+                "success": True,
+                "message": "Item added successfully.",
+                "itemId": row['id'],
+                "action_type": "mutation"
+            }, 201
+        # Conflict: resolve the existing item's id, preferably from the
+        # already-fetched item map, else with one indexed lookup.
+        existing_id = existing.get(content.strip().lower()) if existing is not None else None
+        if existing_id is None:
+            # Python-stripped, not raw: SQL trim() only removes spaces.
+            cursor.execute(SQL_SELECT_ITEM_BY_NORM, (content.strip(), user_id))
+            conflict_row = cursor.fetchone()
+            existing_id = conflict_row['id'] if conflict_row else None
+        return {
+            "success": False,
+            "message": f"Item '{content}' already exists on your list.",
+            "itemId": existing_id,
+            "action_type": "mutation"
+        }, 409 # Conflict
 
-    if existing_item:
+    # Fallback for SQLite < 3.35: separate check then insert.
+    if existing is not None:
+        existing_id = existing.get(content.strip().lower())
+    else:
+        cursor.execute(SQL_SELECT_ITEM_BY_NORM, (content.strip(), user_id))
+        row = cursor.fetchone()
+        existing_id = row['id'] if row else None
+
+    if existing_id is not None:
         return {
             "success": False,
             "message": f"Item '{content}' already exists on your list.",
-            "itemId": existing_item['id'],
+            "itemId": existing_id,
             "action_type": "mutation"
         }, 409 # Conflict
 
-    # If not, insert it
-    cursor.execute(
-        "INSERT INTO items (content, user_id) VALUES (?, ?)",
-        (content.strip(), user_id)
-    )
-    new_item_id = cursor.lastrowid
+    cursor.execute(SQL_INSERT_ITEM, (content.strip(), user_id))
     return {
         "success": True,
         "message": "Item added successfully.",
-        "itemId": new_item_id,
+        "itemId": cursor.lastrowid,
         "action_type": "mutation"
     }, 201
 
-def _handle_update(cursor, db_op, user_id):
+def _handle_update(cursor, db_op, user_id, existing=None):
     """Handles the UPDATE database operation."""
     new_content = db_op.data.content if db_op.data else None
     old_content = db_op.where.content if db_op.where else None
@@ -206,96 +533,148 @@ def _handle_update(cursor, db_op, user_id):
         return {"error": "UPDATE requires 'content' in both 'data' and 'where' clauses."}, 400
 
     # The WHERE clause now also checks for user_id to ensure users can only update their own items.
-    cursor.execute(
-        "UPDATE items SET content = ? WHERE content = ? AND user_id = ?",
-        (new_content, old_content, user_id)
-    )
-    updated_rows = cursor.rowcount
+    # Matching on content_norm tolerates case and whitespace variations in
+    # what the LLM echoes back.
+    try:
+        if _SQLITE_RETURNING:
+            cursor.execute(SQL_UPDATE_ITEM + " RETURNING id", (new_content, old_content, user_id))
+            updated_rows = len(cursor.fetchall())
+        else:
+            cursor.execute(SQL_UPDATE_ITEM, (new_content, old_content, user_id))
+            updated_rows = cursor.rowcount
+    except sqlite3.IntegrityError:
+        # Renaming an item to one already on the list trips the unique
+        # index on (user_id, content_norm); report it as a conflict.
+        return {
+            "success": False,
+            "message": f"Item '{new_content}' already exists on your list.",
+            "action_type": "mutation"
+        }, 409
 
     if updated_rows == 0:
         return {"success": False, "message": "No item found with that content to update.", "action_type": "mutation"}, 404
     
     return {"success": True, "message": f"Successfully updated {updated_rows} item(s).", "action_type": "mutation"}, 200
 
-def _handle_delete(cursor, db_op, user_id):
+def _handle_delete(cursor, db_op, user_id, existing=None):
     """Handles the DELETE database operation."""
     content_to_delete = db_op.where.content if db_op.where else None
     if not content_to_delete:
         return {"error": "DELETE action requires 'content' in the 'where' clause."}, 400
 
     # The WHERE clause now also checks for user_id to ensure users can only delete their own items.
-    cursor.execute(
-        "DELETE FROM items WHERE content = ? AND user_id = ?",
-        (content_to_delete, user_id)
-    )
-    deleted_rows = cursor.rowcount
+    # Matching on content_norm tolerates case and whitespace variations in
+    # what the LLM echoes back.
+    if _SQLITE_RETURNING:
+        cursor.execute(SQL_DELETE_ITEM + " RETURNING id", (content_to_delete, user_id))
+        deleted_rows = len(cursor.fetchall())
+    else:
+        cursor.execute(SQL_DELETE_ITEM, (content_to_delete, user_id))
+        deleted_rows = cursor.rowcount
 
     if deleted_rows == 0:
         return {"success": False, "message": "No item found with that content to delete.", "action_type": "mutation"}, 404
     
     return {"success": True, "message": f"Successfully deleted {deleted_rows} item(s).", "action_type": "mutation"}, 200
 
-def _handle_query(cursor, db_op, user_id):
+def _handle_query(cursor, db_op, user_id, existing=None):
     """Handles the QUERY database operation."""
-    cursor.execute("SELECT content FROM items WHERE user_id = ?", (user_id,))
-    query_items = cursor.fetchall() # Use a different variable name to avoid conflict
-    
-    if not query_items:
+    # Stream tuple rows straight into their quoted form: one pass, no
+    # intermediate fetchall list and no per-row dict lookup.
+    cursor.row_factory = None
+    cursor.execute(SQL_SELECT_ITEM_CONTENTS, (user_id,))
+    quoted_items = [f"'{content}'" for (content,) in cursor]
+    cursor.row_factory = sqlite3.Row
+
+    if not quoted_items:
         message = "You do not have any items on your list."
+    elif len(quoted_items) == 1:
+        message = f"You have one item: {quoted_items[0]}."
     else:
-        # Format the items into a readable string
-        item_contents = [f"'{item['content']}'" for item in query_items]
-        if len(item_contents) == 1:
-            message = f"You have one item: {item_contents[0]}."
-        else:
-            items_str = ", ".join(item_contents)
-            message = f"Your items are: {items_str}."
-    
+        message = f"Your items are: {', '.join(quoted_items)}."
+
     return {"success": True, "message": message, "action_type": "query"}, 200
 
+# Maps LLM action strings to their handlers. Built once at import; the
+# per-request dict literal it replaces was reconstructed on every call.
+ACTION_HANDLERS = {
+    "INSERT": _handle_insert,
+    "UPDATE": _handle_update,
+    "DELETE": _handle_delete,
+    "QUERY": _handle_query,
+}
+
+
 def _build_final_response(base_response_data, status_code, llm_response):
     """Builds the final JSON response, adding suggestions if applicable."""
     # If the database operation was successful, check for and attach any suggestions from the LLM.
     is_successful_operation = status_code < 300
     if is_successful_operation and llm_response and llm_response.suggestion:
-        base_response_data['suggestion'] = {
-            "message": llm_response.suggestion.message,
-            "items": llm_response.suggestion.items
-        }
+        # model_dump is pydantic v2's Rust-backed serializer; same shape as
+        # walking the attributes by hand, without the Python-level work.
+        base_response_data['suggestion'] = llm_response.suggestion.model_dump()
     
-    # This debug print is crucial for verifying the data sent to the frontend.
-    print(f"DEBUG: Final response data being sent: {json.dumps(base_response_data, indent=2)}")
+    # Useful for verifying the data sent to the frontend, but serializing it
+    # on every response is wasted work in production, so only do so when
+    # debug logging is actually on.
+    if app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug("Final response data being sent: %s",
+                         orjson.dumps(base_response_data, option=orjson.OPT_INDENT_2).decode())
     
     return jsonify(base_response_data), status_code
 
 
 @app.route('/process-request', methods=['POST'])
 @login_required
-def process_request(user_id):
+async def process_request(user_id):
     """API endpoint to handle natural language requests for logged-in users."""
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
-    user_text = data.get('text')
+    req, error = _decode_request(ProcessRequest)
+    if error:
+        return error
+    user_text = req.text
     if not user_text:
         return jsonify({"error": "No text provided"}), 400
+    if len(user_text) > MAX_REQUEST_TEXT_LENGTH:
+        return jsonify({"error": "Request too long"}), 413
+    user_text = user_text.translate(_CTRL_TBL)
 
     # The broad try/except is removed. The @app.errorhandler will catch exceptions,
     # and the managed_cursor context manager will handle database rollback.
     with user_db.managed_cursor() as cursor:
-        # --- Provide Context to the LLM ---
-        cursor.execute("SELECT id, content FROM items WHERE user_id = ?", (user_id,))
-        items = cursor.fetchall()
-        items_list = [dict(item) for item in items]
-
-        # 2. Call the LLM with the user's text and the context of their current items.
-        llm_response = llm_assistant.get_database_operation_from_text(user_text, current_items=items_list)
+        # 1. Try the regex fast-path first; simple requests never touch the
+        # LLM (and don't need the item-context query either).
+        llm_response = _fast_parse(user_text)
+        existing = None
+
+        if llm_response is None:
+            # --- Provide Context to the LLM ---
+            items_list = _get_cached_items(user_id)
+            if items_list is None:
+                # Tuple rows avoid the dict(Row) reflection path; the dicts
+                # are built directly. Row mode is restored for the handlers.
+                cursor.row_factory = None
+                cursor.execute(SQL_SELECT_ITEMS, (user_id,))
+                items_list = [{'id': item_id, 'content': content}
+                              for item_id, content in cursor.fetchall()]
+                cursor.row_factory = sqlite3.Row
+                _set_cached_items(user_id, items_list)
+            # The item list doubles as the duplicate-check map for INSERT,
+            # saving a second query over the same table.
+            existing = {
+                item['content'].strip().lower(): item['id'] for item in items_list
+            }
+
+            # 2. Call the LLM with the user's text and the context of their
+            # current items. Awaiting releases the event loop for the
+            # duration of the Gemini round-trip.
+            llm_response = await llm_assistant.aget_database_operation_from_text(user_text, current_items=items_list)
 
         if not llm_response:
             return jsonify({"error": "Failed to understand the request or LLM is not configured."}), 500
 
-        # For debugging, print the Pydantic object received from the LLM.
-        print(f"DEBUG: Received response from LLM: {llm_response}")
+        # For debugging, log the Pydantic object received from the LLM.
+        if app.logger.isEnabledFor(logging.DEBUG):
+            app.logger.debug("Received response from LLM: %s", llm_response)
 
         # Check if the LLM returned a request for clarification
         if llm_response.ambiguous_request:
@@ -309,22 +688,99 @@ def process_request(user_id):
             return jsonify({"error": "LLM did not return a valid database operation."}), 500
 
         # --- Action Dispatcher ---
-        # Use a dictionary to map action strings to their handler functions.
-        action_handlers = {
-            "INSERT": _handle_insert,
-            "UPDATE": _handle_update,
-            "DELETE": _handle_delete,
-            "QUERY": _handle_query,
-        }
-
-        handler = action_handlers.get(db_op.action)
+        handler = ACTION_HANDLERS.get(db_op.action)
 
         if handler:
-            base_response_data, status_code = handler(cursor, db_op, user_id)
+            base_response_data, status_code = handler(cursor, db_op, user_id, existing)
+            if status_code < 300 and db_op.action != "QUERY":
+                _invalidate_items_cache(user_id)
             return _build_final_response(base_response_data, status_code, llm_response)
         else:
             return jsonify({"error": f"Unknown or unsupported action: {db_op.action}"}), 400
 
+
+@app.route('/process-requests', methods=['POST'])
+@login_required
+async def process_requests_batch(user_id):
+    """Processes a batch of natural language requests in one call.
+
+    All texts are interpreted concurrently (one Gemini round-trip for the
+    whole batch instead of one per text) and the resulting operations are
+    applied in a single transaction.
+    """
+    req, error = _decode_request(ProcessBatchRequest)
+    if error:
+        return error
+    texts = req.texts
+    if not texts:
+        return jsonify({"error": "No texts provided"}), 400
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({"error": f"Batch too large (max {MAX_BATCH_TEXTS} texts)"}), 413
+    if any(not t or len(t) > MAX_REQUEST_TEXT_LENGTH for t in texts):
+        return jsonify({"error": "Each text must be a non-empty string of at most "
+                                 f"{MAX_REQUEST_TEXT_LENGTH} characters"}), 400
+    texts = [t.translate(_CTRL_TBL) for t in texts]
+
+    with user_db.managed_cursor() as cursor:
+        items_list = _get_cached_items(user_id)
+        if items_list is None:
+            cursor.row_factory = None
+            cursor.execute(SQL_SELECT_ITEMS, (user_id,))
+            items_list = [{'id': item_id, 'content': content}
+                          for item_id, content in cursor.fetchall()]
+            cursor.row_factory = sqlite3.Row
+            _set_cached_items(user_id, items_list)
+        existing = {item['content'].strip().lower(): item['id'] for item in items_list}
+
+        # Interpret every text concurrently; the semaphore keeps the number
+        # of in-flight Gemini calls inside API rate limits.
+        semaphore = asyncio.Semaphore(LLM_BATCH_CONCURRENCY)
+
+        async def interpret(text):
+            fast_response = _fast_parse(text)
+            if fast_response is not None:
+                return fast_response
+            async with semaphore:
+                return await llm_assistant.aget_database_operation_from_text(
+                    text, current_items=items_list
+                )
+
+        responses = await asyncio.gather(*(interpret(text) for text in texts))
+
+        # Apply the operations sequentially inside the one open transaction.
+        results = []
+        mutated = False
+        for text, llm_response in zip(texts, responses):
+            if not llm_response:
+                results.append({"text": text, "error": "Failed to understand the request."})
+                continue
+            if llm_response.ambiguous_request:
+                results.append({"text": text, "error": llm_response.ambiguous_request.message})
+                continue
+            db_op = llm_response.database_operation
+            if not db_op:
+                results.append({"text": text, "error": "No valid database operation."})
+                continue
+            handler = ACTION_HANDLERS.get(db_op.action)
+            if not handler:
+                results.append({"text": text, "error": f"Unknown or unsupported action: {db_op.action}"})
+                continue
+            base_response_data, status_code = handler(cursor, db_op, user_id, existing)
+            if status_code < 300 and db_op.action != "QUERY":
+                mutated = True
+            # Keep the duplicate-check map current so repeated inserts within
+            # one batch are caught instead of tripping the unique index.
+            if db_op.action == "INSERT" and status_code == 201 and db_op.data:
+                existing[db_op.data.content.strip().lower()] = base_response_data.get("itemId")
+            base_response_data["text"] = text
+            base_response_data["status"] = status_code
+            results.append(base_response_data)
+
+    if mutated:
+        _invalidate_items_cache(user_id)
+    return jsonify({"success": True, "results": results}), 200
+
+
 # --- Main execution block ---
 if __name__ == '__main__':
     app.run(debug=True, port=5001)